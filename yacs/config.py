@@ -29,6 +29,22 @@ from ast import literal_eval
 
 import yaml
 
+# numpy is an optional dependency, only required when numeric-list storage is
+# enabled via CfgNode.NUMERIC_LISTS_AS_NDARRAY
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Prefer libyaml's C loader/dumper when PyYAML was built against it; parsing
+# and emitting are several times faster with no behavior change
+try:
+    from yaml import CSafeDumper as _Dumper
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeDumper as _Dumper
+    from yaml import SafeLoader as _Loader
+
 # Flag for py2 and py3 compatibility to use when separate code paths are necessary
 # When _PY2 is False, we assume Python 3 is in use
 _PY2 = sys.version_info.major == 2
@@ -57,8 +73,56 @@ if _PY2:
 else:
     import importlib.util
 
+# Config key tokens repeat across nodes, files, and overrides; interning them
+# deduplicates the strings and lets dict lookups hit the identity fast path
+if _PY2:
+    _intern = intern  # noqa: F821
+else:
+    _intern = sys.intern
+
 logger = logging.getLogger(__name__)
 
+# Parsed configs memoized by (CfgNode class, absolute path, mtime, size) so
+# repeated merge_from_file calls skip YAML parsing entirely. The cache is
+# cleared once it reaches _FILE_CACHE_MAX_SIZE entries; workloads rarely
+# touch more than a handful of distinct config files
+_FILE_CACHE = {}
+_FILE_CACHE_MAX_SIZE = 128
+
+# Deprecated and renamed options
+# Both registries live in a single per-node dict mapping the full config key
+# to a (status tag, payload) tuple, so the merge slow path classifies a
+# missing key with one lookup. Use register_deprecated_key() for options
+# removed from the code that should not break existing yaml configs, and
+# register_renamed_key() to record the mapping from an old key name to its
+# new name (optionally with instructions for how to edit the config file).
+_KEY_STATUS_DEPRECATED = 0
+_KEY_STATUS_RENAMED = 1
+
+
+def _key_status_name(status):
+    """Human-readable name of a key-status entry, for error messages."""
+    if status is not None and status[0] == _KEY_STATUS_RENAMED:
+        return "renamed"
+    return "deprecated"
+
+
+# Shared read-only stand-in for the key-status registry of nodes that never
+# registered any deprecated or renamed keys
+_NO_KEY_STATUS = {}
+
+# Sentinel distinguishing "key absent" from a stored None
+_MISSING = object()
+
+# Counter tracking structural config mutations; per-node path caches record
+# the value they were built against and are discarded when it moves on
+_CFG_VERSION = 0
+
+
+def _bump_cfg_version():
+    global _CFG_VERSION
+    _CFG_VERSION += 1
+
 
 class CfgNode(dict):
     """
@@ -67,9 +131,23 @@ class CfgNode(dict):
     """
 
     IMMUTABLE = "__immutable__"
-    DEPRECATED_KEYS = "__deprecated_keys__"
-    RENAMED_KEYS = "__renamed_keys__"
+    KEY_STATUS = "__key_status__"
     NEW_ALLOWED = "__new_allowed__"
+    PATH_CACHE = "__path_cache__"
+    PATH_TRIE = "__path_trie__"
+    CHILD_NODES = "__child_nodes__"
+
+    # Every key reserved for internal state in __dict__; state is materialized
+    # lazily, so the __setattr__ guard must check this set rather than only
+    # what happens to be in __dict__ already
+    _STATE_KEYS = frozenset(
+        {IMMUTABLE, KEY_STATUS, NEW_ALLOWED, PATH_CACHE, PATH_TRIE, CHILD_NODES}
+    )
+
+    # Opt-in: store homogeneous numeric lists as numpy arrays. Long vectors of
+    # Python floats cost ~28 bytes per element; typed array storage cuts that
+    # roughly 7x. Off by default for backward compatibility; requires numpy
+    NUMERIC_LISTS_AS_NDARRAY = False
 
     def __init__(self, init_dict=None, key_list=None, new_allowed=False):
         """
@@ -85,28 +163,14 @@ class CfgNode(dict):
         key_list = [] if key_list is None else key_list
         init_dict = self._create_config_tree_from_dict(init_dict, key_list)
         super(CfgNode, self).__init__(init_dict)
-        # Manage if the CfgNode is frozen or not
-        self.__dict__[CfgNode.IMMUTABLE] = False
-        # Deprecated options
-        # If an option is removed from the code and you don't want to break existing
-        # yaml configs, you can add the full config key as a string to the set below.
-        self.__dict__[CfgNode.DEPRECATED_KEYS] = set()
-        # Renamed options
-        # If you rename a config option, record the mapping from the old name to the new
-        # name in the dictionary below. Optionally, if the type also changed, you can
-        # make the value a tuple that specifies first the renamed key and then
-        # instructions for how to edit the config file.
-        self.__dict__[CfgNode.RENAMED_KEYS] = {
-            # 'EXAMPLE.OLD.KEY': 'EXAMPLE.NEW.KEY',  # Dummy example to follow
-            # 'EXAMPLE.OLD.KEY': (                   # A more complex example to follow
-            #     'EXAMPLE.NEW.KEY',
-            #     "Also convert to a tuple, e.g., 'foo' -> ('foo',) or "
-            #     + "'foo:bar' -> ('foo', 'bar')"
-            # ),
-        }
-
-        # Allow new attributes after initialisation
-        self.__dict__[CfgNode.NEW_ALLOWED] = new_allowed
+        # Per-node state (mutability flag, key-status registry, path caches)
+        # lives in __dict__ and is allocated lazily with all-default
+        # semantics: most nodes in a large config never freeze, never allow
+        # new keys, and never register deprecated/renamed keys, so they do
+        # not pay the per-instance dict entries for that bookkeeping
+        if new_allowed:
+            # Allow new attributes after initialisation
+            self.__dict__[CfgNode.NEW_ALLOWED] = new_allowed
 
     @classmethod
     def _create_config_tree_from_dict(cls, dic, key_list):
@@ -119,19 +183,28 @@ class CfgNode(dict):
             key_list (list[str]): a list of names which index this CfgNode from the root.
                 Currently only used for logging purposes.
         """
+        if cls.NUMERIC_LISTS_AS_NDARRAY:
+            _assert_with_logging(
+                np is not None, "NUMERIC_LISTS_AS_NDARRAY requires numpy"
+            )
         dic = copy.deepcopy(dic)
-        for k, v in dic.items():
+        for k in list(dic.keys()):
+            v = dic.pop(k)
+            if type(k) is str:
+                k = _intern(k)
             if isinstance(v, dict):
                 # Convert dict to CfgNode
-                dic[k] = cls(v, key_list=key_list + [k])
-            else:
-                # Check for valid leaf type or nested CfgNode
-                _assert_with_logging(
-                    _valid_type(v, allow_cfg_node=False),
+                v = cls(v, key_list=key_list + [k])
+            elif cls.NUMERIC_LISTS_AS_NDARRAY and _is_numeric_list(v):
+                v = np.asarray(v)
+            # Check for valid leaf type or nested CfgNode
+            elif not _valid_type(v, allow_cfg_node=False):
+                raise AssertionError(
                     "Key {} with value {} is not a valid type; valid types: {}".format(
                         ".".join(key_list + [str(k)]), type(v), _VALID_TYPES
-                    ),
+                    )
                 )
+            dic[k] = v
         return dic
 
     def __getattr__(self, name):
@@ -148,19 +221,64 @@ class CfgNode(dict):
                 )
             )
 
-        _assert_with_logging(
-            name not in self.__dict__,
-            "Invalid attempt to modify internal CfgNode state: {}".format(name),
-        )
-        _assert_with_logging(
-            _valid_type(value, allow_cfg_node=True),
-            "Invalid type {} for key {}; valid types = {}".format(
-                type(value), name, _VALID_TYPES
-            ),
-        )
+        # Checked inline so the failure messages are only formatted when a
+        # check actually fails; attribute assignment is a hot path when
+        # building large configs
+        if name in self.__dict__ or name in CfgNode._STATE_KEYS:
+            raise AssertionError(
+                "Invalid attempt to modify internal CfgNode state: {}".format(name)
+            )
+        if not _valid_type(value, allow_cfg_node=True):
+            raise AssertionError(
+                "Invalid type {} for key {}; valid types = {}".format(
+                    type(value), name, _VALID_TYPES
+                )
+            )
 
         self[name] = value
 
+    def __setitem__(self, name, value):
+        # Adding a key or attaching/detaching a subtree changes the config
+        # structure, so cached path resolutions and child lists anywhere in
+        # the tree may now be stale; overwriting a leaf in place does not
+        old = dict.get(self, name, _MISSING)
+        if (
+            old is _MISSING
+            or isinstance(value, CfgNode)
+            or isinstance(old, CfgNode)
+        ):
+            _bump_cfg_version()
+        dict.__setitem__(self, name, value)
+
+    # The inherited dict mutators do not route through __setitem__ in
+    # CPython, so each one bumps the structure version itself; otherwise
+    # cached path resolutions, the trie, and child lists would keep pointing
+    # at removed or replaced subtrees
+
+    def __delitem__(self, name):
+        _bump_cfg_version()
+        dict.__delitem__(self, name)
+
+    def update(self, *args, **kwargs):
+        _bump_cfg_version()
+        dict.update(self, *args, **kwargs)
+
+    def pop(self, *args):
+        _bump_cfg_version()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        _bump_cfg_version()
+        return dict.popitem(self)
+
+    def setdefault(self, *args):
+        _bump_cfg_version()
+        return dict.setdefault(self, *args)
+
+    def clear(self):
+        _bump_cfg_version()
+        dict.clear(self)
+
     def __str__(self):
         def _indent(s_, num_spaces):
             s = s_.split("\n")
@@ -187,30 +305,43 @@ class CfgNode(dict):
 
     def dump(self, **kwargs):
         """Dump to a string."""
-
-        def convert_to_dict(cfg_node, key_list):
-            if not isinstance(cfg_node, CfgNode):
-                _assert_with_logging(
-                    _valid_type(cfg_node),
-                    "Key {} with value {} is not a valid type; valid types: {}".format(
-                        ".".join(key_list), type(cfg_node), _VALID_TYPES
-                    ),
-                )
-                return cfg_node
-            else:
-                cfg_dict = dict(cfg_node)
-                for k, v in cfg_dict.items():
-                    cfg_dict[k] = convert_to_dict(v, key_list + [k])
-                return cfg_dict
-
-        self_as_dict = convert_to_dict(self, [])
-        return yaml.safe_dump(self_as_dict, **kwargs)
+        # CfgNodes are emitted as plain mappings via the representer
+        # registered below, so no intermediate dict tree is built
+        return yaml.dump(self, Dumper=_CfgNodeDumper, **kwargs)
 
     def merge_from_file(self, cfg_filename):
         """Load a yaml config file and merge it this CfgNode."""
-        with open(cfg_filename, "r") as f:
-            cfg = self.load_cfg(f)
-        self.merge_from_other_cfg(cfg)
+        # Only YAML parsing is a pure function of the file contents; Python
+        # source configs may read the environment or other ambient state, so
+        # they are re-executed on every load as they always were
+        _, file_extension = os.path.splitext(cfg_filename)
+        if file_extension not in _YAML_EXTS:
+            with open(cfg_filename, "rb") as f:
+                self.merge_from_other_cfg(self.load_cfg(f))
+            return
+        # Cache the parsed config keyed by file identity; sweeps and test
+        # suites load the same file many times
+        st = os.stat(cfg_filename)
+        # NUMERIC_LISTS_AS_NDARRAY is part of the key because the YAML
+        # constructor bakes it into the parsed tree
+        cache_key = (
+            type(self),
+            CfgNode.NUMERIC_LISTS_AS_NDARRAY,
+            os.path.abspath(cfg_filename),
+            getattr(st, "st_mtime_ns", st.st_mtime),
+            st.st_size,
+        )
+        cfg = _FILE_CACHE.get(cache_key)
+        if cfg is None:
+            # Binary mode lets libyaml decode from its own buffer without an
+            # intermediate Python-level text layer
+            with open(cfg_filename, "rb") as f:
+                cfg = self.load_cfg(f)
+            if len(_FILE_CACHE) >= _FILE_CACHE_MAX_SIZE:
+                _FILE_CACHE.clear()
+            _FILE_CACHE[cache_key] = cfg
+        # Merge a clone so downstream mutations cannot corrupt the cache
+        self.merge_from_other_cfg(cfg.clone())
 
     def merge_from_other_cfg(self, cfg_other):
         """Merge `cfg_other` into this CfgNode."""
@@ -220,97 +351,244 @@ class CfgNode(dict):
         """Merge config (keys, values) in a list (e.g., from command line) into
         this CfgNode. For example, `cfg_list = ['FOO.BAR', 0.5]`.
         """
-        _assert_with_logging(
-            len(cfg_list) % 2 == 0,
-            "Override list has odd length: {}; it must be a list of pairs".format(
-                cfg_list
-            ),
-        )
-        root = self
+        if len(cfg_list) % 2 != 0:
+            raise AssertionError(
+                "Override list has odd length: {}; it must be a list of pairs".format(
+                    cfg_list
+                )
+            )
+        key_status = self.__dict__.get(CfgNode.KEY_STATUS, _NO_KEY_STATUS)
+        path_cache = self._get_path_cache()
+        # Overrides are classified and applied in input order: reordering
+        # would break last-override-wins when a subtree replacement follows a
+        # write inside that subtree. The descent below still reuses the
+        # dotted prefix shared with the previous key, which covers the common
+        # sweep input of consecutive keys under the same section
+        entries = []
         for full_key, v in zip(cfg_list[0::2], cfg_list[1::2]):
-            if root.key_is_deprecated(full_key):
+            status = key_status.get(full_key)
+            if status is not None:
+                if status[0] == _KEY_STATUS_RENAMED:
+                    self.raise_key_rename_error(full_key)
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning(
+                        "Deprecated config key (ignoring): {}".format(full_key)
+                    )
                 continue
-            if root.key_is_renamed(full_key):
-                root.raise_key_rename_error(full_key)
-            key_list = full_key.split(".")
-            d = self
-            for subkey in key_list[:-1]:
-                _assert_with_logging(
-                    subkey in d, "Non-existent key: {}".format(full_key)
-                )
-                d = d[subkey]
-            subkey = key_list[-1]
-            _assert_with_logging(subkey in d, "Non-existent key: {}".format(full_key))
-            value = self._decode_cfg_value(v)
-            value = _check_and_coerce_cfg_value_type(value, d[subkey], subkey, full_key)
+            entries.append((full_key, v))
+        # cursor[j] is the node reached after consuming j tokens of the
+        # previously resolved key path
+        cursor = [self]
+        prev_tokens = []
+        for full_key, v in entries:
+            cached = path_cache.get(full_key)
+            if cached is not None:
+                subkey, d = cached
+            else:
+                tokens = [_intern(subkey) for subkey in full_key.split(".")]
+                trie = self._get_path_trie()
+                if trie is not None:
+                    entry = None
+                    for subkey in tokens:
+                        entry = trie.get(subkey) if trie is not None else None
+                        if entry is None:
+                            raise AssertionError(
+                                "Non-existent key: {}".format(full_key)
+                            )
+                        trie, d = entry
+                    subkey = tokens[-1]
+                else:
+                    common = 0
+                    limit = min(len(tokens), len(prev_tokens)) - 1
+                    while common < limit and tokens[common] == prev_tokens[common]:
+                        common += 1
+                    del cursor[common + 1:]
+                    d = cursor[common]
+                    for token in tokens[common:-1]:
+                        if token not in d:
+                            raise AssertionError(
+                                "Non-existent key: {}".format(full_key)
+                            )
+                        d = d[token]
+                        cursor.append(d)
+                    subkey = tokens[-1]
+                    if subkey not in d:
+                        raise AssertionError("Non-existent key: {}".format(full_key))
+                    prev_tokens = tokens
+                path_cache[full_key] = (subkey, d)
+            value = self._decode_and_coerce_cfg_value(v, d[subkey], subkey, full_key)
             d[subkey] = value
+            if isinstance(value, CfgNode):
+                # The assignment replaced a whole subtree (bumping the
+                # structure version), so refresh the cache reference and drop
+                # cursor state that may point into the detached subtree
+                path_cache = self._get_path_cache()
+                cursor = [self]
+                prev_tokens = []
+
+    def _get_path_cache(self):
+        """Return the memoized dotted-path resolutions for this CfgNode,
+        discarding them if the config structure changed since they were built.
+
+        The cache maps a full key (e.g. `FOO.BAR`) to `(last subkey, parent
+        CfgNode)` so repeated overrides skip the split plus descent.
+        """
+        cached = self.__dict__.get(CfgNode.PATH_CACHE)
+        if cached is None or cached[0] != _CFG_VERSION:
+            cache = {}
+            self.__dict__[CfgNode.PATH_CACHE] = (_CFG_VERSION, cache)
+            return cache
+        return cached[1]
+
+    def _build_trie(self):
+        """Build a trie over the valid dotted key paths of this CfgNode.
+
+        Each trie node maps a key token to `(child trie node or None, CfgNode
+        holding the token)`, so a full key resolves by iterating its tokens
+        against plain dicts instead of re-walking the live config. Built when
+        the config is frozen; stale tries are detected via the structure
+        version and simply rebuilt on the next freeze.
+        """
+
+        def build(node):
+            trie = {}
+            for k, v in node.items():
+                if isinstance(v, CfgNode):
+                    trie[k] = (build(v), node)
+                else:
+                    trie[k] = (None, node)
+            return trie
+
+        self.__dict__[CfgNode.PATH_TRIE] = (_CFG_VERSION, build(self))
+
+    def _get_path_trie(self):
+        """Return the key-path trie if one is built and still valid."""
+        cached = self.__dict__.get(CfgNode.PATH_TRIE)
+        if cached is not None and cached[0] == _CFG_VERSION:
+            return cached[1]
+        return None
 
     def freeze(self):
         """Make this CfgNode and all of its children immutable."""
         self._immutable(True)
+        # Frozen configs are the common target of repeated CLI override
+        # sweeps, so precompute the key-path trie for them
+        self._build_trie()
 
     def defrost(self):
         """Make this CfgNode and all of its children mutable."""
         self._immutable(False)
+        self.__dict__.pop(CfgNode.PATH_TRIE, None)
 
     def is_frozen(self):
         """Return mutability."""
-        return self.__dict__[CfgNode.IMMUTABLE]
+        return self.__dict__.get(CfgNode.IMMUTABLE, False)
 
     def _immutable(self, is_immutable):
-        """Set immutability to is_immutable and recursively apply the setting
-        to all nested CfgNodes.
+        """Set immutability to is_immutable and apply the setting to all
+        nested CfgNodes via an iterative walk over the cached child lists.
         """
-        self.__dict__[CfgNode.IMMUTABLE] = is_immutable
-        # Recursively set immutable state
-        for v in self.__dict__.values():
-            if isinstance(v, CfgNode):
-                v._immutable(is_immutable)
-        for v in self.values():
-            if isinstance(v, CfgNode):
-                v._immutable(is_immutable)
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            node.__dict__[CfgNode.IMMUTABLE] = is_immutable
+            stack.extend(node._get_child_nodes())
+
+    def _get_child_nodes(self):
+        """Return the (cached) list of direct CfgNode children, so tree-wide
+        walks skip the isinstance test on every leaf value.
+        """
+        cached = self.__dict__.get(CfgNode.CHILD_NODES)
+        if cached is not None and cached[0] == _CFG_VERSION:
+            return cached[1]
+        children = [v for v in self.__dict__.values() if isinstance(v, CfgNode)]
+        children.extend(v for v in self.values() if isinstance(v, CfgNode))
+        self.__dict__[CfgNode.CHILD_NODES] = (_CFG_VERSION, children)
+        return children
 
     def clone(self):
         """Recursively copy this CfgNode."""
-        return copy.deepcopy(self)
+        return self._fast_clone()
+
+    def _fast_clone(self):
+        """Specialized recursive copy of this CfgNode.
+
+        Configs only contain nested CfgNodes, containers, and immutable
+        scalars, so a hand-rolled walk avoids copy.deepcopy's memo dict and
+        `__reduce_ex__` dispatch, which dominate its cost on small objects.
+        """
+        cloned = self.__class__()
+        cloned_dict = cloned.__dict__
+        self_dict = self.__dict__
+        for state_key in (CfgNode.IMMUTABLE, CfgNode.NEW_ALLOWED):
+            if state_key in self_dict:
+                cloned_dict[state_key] = self_dict[state_key]
+        key_status = self_dict.get(CfgNode.KEY_STATUS)
+        if key_status:
+            cloned_dict[CfgNode.KEY_STATUS] = dict(key_status)
+        # Path caches are not copied; they are rebuilt lazily and would
+        # otherwise reference nodes of the original tree
+        # Write through dict.__setitem__: a freshly built tree cannot have
+        # stale caches, so the structural bookkeeping in __setitem__ (and its
+        # global version bump) is not needed here
+        for k, v in self.items():
+            if isinstance(v, CfgNode):
+                dict.__setitem__(cloned, k, v._fast_clone())
+            else:
+                dict.__setitem__(cloned, k, _clone_cfg_value(v))
+        return cloned
 
     def register_deprecated_key(self, key):
         """Register key (e.g. `FOO.BAR`) a deprecated option. When merging deprecated
         keys a warning is generated and the key is ignored.
+
+        A key can hold only one status: registering a key that is already
+        deprecated or renamed is an error.
         """
+        key_status = self.__dict__.setdefault(CfgNode.KEY_STATUS, {})
         _assert_with_logging(
-            key not in self.__dict__[CfgNode.DEPRECATED_KEYS],
-            "key {} is already registered as a deprecated key".format(key),
+            key not in key_status,
+            "key {} is already registered as a {} key".format(
+                key, _key_status_name(key_status.get(key))
+            ),
         )
-        self.__dict__[CfgNode.DEPRECATED_KEYS].add(key)
+        key_status[key] = (_KEY_STATUS_DEPRECATED, None)
 
     def register_renamed_key(self, old_name, new_name, message=None):
         """Register a key as having been renamed from `old_name` to `new_name`.
         When merging a renamed key, an exception is thrown alerting to user to
         the fact that the key has been renamed.
+
+        A key can hold only one status: registering a key that is already
+        deprecated or renamed is an error.
         """
+        key_status = self.__dict__.setdefault(CfgNode.KEY_STATUS, {})
         _assert_with_logging(
-            old_name not in self.__dict__[CfgNode.RENAMED_KEYS],
-            "key {} is already registered as a renamed cfg key".format(old_name),
+            old_name not in key_status,
+            "key {} is already registered as a {} key".format(
+                old_name, _key_status_name(key_status.get(old_name))
+            ),
         )
         value = new_name
         if message:
             value = (new_name, message)
-        self.__dict__[CfgNode.RENAMED_KEYS][old_name] = value
+        key_status[old_name] = (_KEY_STATUS_RENAMED, value)
 
     def key_is_deprecated(self, full_key):
         """Test if a key is deprecated."""
-        if full_key in self.__dict__[CfgNode.DEPRECATED_KEYS]:
+        status = self.__dict__.get(CfgNode.KEY_STATUS, _NO_KEY_STATUS).get(full_key)
+        if status is not None and status[0] == _KEY_STATUS_DEPRECATED:
             logger.warning("Deprecated config key (ignoring): {}".format(full_key))
             return True
         return False
 
     def key_is_renamed(self, full_key):
         """Test if a key is renamed."""
-        return full_key in self.__dict__[CfgNode.RENAMED_KEYS]
+        status = self.__dict__.get(CfgNode.KEY_STATUS, _NO_KEY_STATUS).get(full_key)
+        return status is not None and status[0] == _KEY_STATUS_RENAMED
 
     def raise_key_rename_error(self, full_key):
-        new_key = self.__dict__[CfgNode.RENAMED_KEYS][full_key]
+        new_key = self.__dict__[CfgNode.KEY_STATUS][full_key][1]
         if isinstance(new_key, tuple):
             msg = " Note: " + new_key[1]
             new_key = new_key[0]
@@ -323,21 +601,18 @@ class CfgNode(dict):
         )
 
     def is_new_allowed(self):
-        return self.__dict__[CfgNode.NEW_ALLOWED]
+        return self.__dict__.get(CfgNode.NEW_ALLOWED, False)
 
     def set_new_allowed(self, is_new_allowed):
         """
         Set this config (and recursively its subconfigs) to allow merging
         new keys from other configs.
         """
-        self.__dict__[CfgNode.NEW_ALLOWED] = is_new_allowed
-        # Recursively set new_allowed state
-        for v in self.__dict__.values():
-            if isinstance(v, CfgNode):
-                v.set_new_allowed(is_new_allowed)
-        for v in self.values():
-            if isinstance(v, CfgNode):
-                v.set_new_allowed(is_new_allowed)
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            node.__dict__[CfgNode.NEW_ALLOWED] = is_new_allowed
+            stack.extend(node._get_child_nodes())
 
     @classmethod
     def load_cfg(cls, cfg_file_obj_or_str):
@@ -369,7 +644,10 @@ class CfgNode(dict):
         """Load a config from a YAML file or a Python source file."""
         _, file_extension = os.path.splitext(file_obj.name)
         if file_extension in _YAML_EXTS:
-            return cls._load_cfg_from_yaml_str(file_obj.read())
+            # Hand the file object straight to the parser, which streams it
+            # through its own buffer instead of materializing the whole file
+            # as a Python string first
+            return cls._load_cfg_from_yaml_str(file_obj)
         elif file_extension in _PY_EXTS:
             return cls._load_cfg_py_source(file_obj.name)
         else:
@@ -380,9 +658,14 @@ class CfgNode(dict):
 
     @classmethod
     def _load_cfg_from_yaml_str(cls, str_obj):
-        """Load a config from a YAML string encoding."""
-        cfg_as_dict = yaml.safe_load(str_obj)
-        return cls(cfg_as_dict)
+        """Load a config from a YAML string encoding or stream."""
+        cfg = yaml.load(str_obj, Loader=_CfgNodeLoader)
+        # The loader already built (and validated) a CfgNode tree; only
+        # subclasses still need the converting constructor so that nodes end
+        # up with the right type
+        if cls is CfgNode and isinstance(cfg, CfgNode):
+            return cfg
+        return cls(cfg)
 
     @classmethod
     def _load_cfg_py_source(cls, filename):
@@ -418,26 +701,26 @@ class CfgNode(dict):
         # All remaining processing is only applied to strings
         if not isinstance(value, str):
             return value
-        # Try to interpret `value` as a:
-        #   string, number, tuple, list, dict, boolean, or None
-        try:
-            value = literal_eval(value)
-        # The following two excepts allow v to pass through when it represents a
-        # string.
-        #
-        # Longer explanation:
-        # The type of v is always a string (before calling literal_eval), but
-        # sometimes it *represents* a string and other times a data structure, like
-        # a list. In the case that v represents a string, what we got back from the
-        # yaml parser is 'foo' *without quotes* (so, not '"foo"'). literal_eval is
-        # ok with '"foo"', but will raise a ValueError if given 'foo'. In other
-        # cases, like paths (v = 'foo/bar' and not v = '"foo/bar"'), literal_eval
-        # will raise a SyntaxError.
-        except ValueError:
-            pass
-        except SyntaxError:
-            pass
-        return value
+        return _literal_eval_cached(value)
+
+    @classmethod
+    def _decode_and_coerce_cfg_value(cls, value, original, key, full_key):
+        """Decode a raw config value and coerce it to the type of `original`
+        in a single pass.
+
+        Fusing the two steps lets the common cases short-circuit: a string
+        replacing a string needs neither literal_eval nor coercion, and
+        non-string non-dict values skip the decode ladder entirely. The
+        "None" token is excluded from the fast path so that assigning None
+        to a string key from the command line keeps working.
+        """
+        if type(value) is str:
+            if type(original) is str and value != "None":
+                return value
+            value = _literal_eval_cached(value)
+        elif isinstance(value, dict):
+            value = cls(value)
+        return _check_and_coerce_cfg_value_type(value, original, key, full_key)
 
 
 load_cfg = (
@@ -445,50 +728,273 @@ load_cfg = (
 )  # keep this function in global scope for backward compatibility
 
 
+class _CfgNodeLoader(_Loader):
+    """YAML loader that emits mappings directly as CfgNodes.
+
+    Constructing the nodes during parsing removes the second full tree walk
+    (and its allocations) that wrapping every nested dict after the fact
+    would cost. Note that anchored/aliased mappings resolve to a shared
+    CfgNode within one document.
+    """
+
+
+def _construct_cfg_node(loader, node):
+    """Construct a CfgNode from a YAML mapping node, validating leaf types
+    the same way CfgNode.__init__ does for plain dicts.
+    """
+    numeric_lists_as_ndarray = CfgNode.NUMERIC_LISTS_AS_NDARRAY
+    if numeric_lists_as_ndarray:
+        _assert_with_logging(
+            np is not None, "NUMERIC_LISTS_AS_NDARRAY requires numpy"
+        )
+    mapping = loader.construct_mapping(node, deep=True)
+    cfg = CfgNode()
+    for k, v in mapping.items():
+        if type(k) is str:
+            k = _intern(k)
+        if numeric_lists_as_ndarray and _is_numeric_list(v):
+            v = np.asarray(v)
+        if not isinstance(v, CfgNode) and not _valid_type(v):
+            raise AssertionError(
+                "Key {} with value {} is not a valid type; valid types: {}".format(
+                    k, type(v), _VALID_TYPES
+                )
+            )
+        dict.__setitem__(cfg, k, v)
+    return cfg
+
+
+_CfgNodeLoader.add_constructor("tag:yaml.org,2002:map", _construct_cfg_node)
+
+
+def _represent_cfg_node(dumper, data):
+    """Emit a CfgNode as a plain YAML mapping."""
+    return dumper.represent_dict(data)
+
+
+# Registered as a multi representer so CfgNode subclasses are covered too;
+# this keeps serialization inside the (possibly C) dumper instead of
+# converting the tree to nested plain dicts first
+yaml.SafeDumper.add_multi_representer(CfgNode, _represent_cfg_node)
+if _Dumper is not yaml.SafeDumper:
+    _Dumper.add_multi_representer(CfgNode, _represent_cfg_node)
+
+
+class _CfgNodeDumper(_Dumper):
+    """YAML dumper used by CfgNode.dump().
+
+    Representers for types yacs does not own (numpy arrays) live on this
+    subclass only, so importing yacs does not change how unrelated
+    yaml.safe_dump calls in the same process serialize them.
+    """
+
+
+if np is not None:
+
+    def _represent_ndarray(dumper, data):
+        """Emit a numeric array as a plain YAML sequence."""
+        return dumper.represent_list(data.tolist())
+
+    _CfgNodeDumper.add_multi_representer(np.ndarray, _represent_ndarray)
+
+
+# Memoized literal_eval results for repeated string values like "True",
+# "None", or "0.5"; literal_eval builds a full AST per call, so caching skips
+# lexing and parsing on the common repeated inputs
+_LITERAL_EVAL_CACHE = {}
+_LITERAL_EVAL_CACHE_MAX_SIZE = 4096
+
+
+def _literal_eval_cached(value):
+    """Interpret a string `value` as a string, number, tuple, list, dict,
+    boolean, or None, memoizing the result for repeated inputs.
+
+    Only immutable results (scalars and tuples of scalars) are cached so that
+    configs never end up sharing a mutable container.
+    """
+    try:
+        return _LITERAL_EVAL_CACHE[value]
+    except KeyError:
+        pass
+    try:
+        decoded = literal_eval(value)
+    # The following except allows `value` to pass through when it represents a
+    # string.
+    #
+    # Longer explanation:
+    # The type of `value` is always a string (before calling literal_eval), but
+    # sometimes it *represents* a string and other times a data structure, like
+    # a list. In the case that it represents a string, what we got back from the
+    # yaml parser is 'foo' *without quotes* (so, not '"foo"'). literal_eval is
+    # ok with '"foo"', but will raise a ValueError if given 'foo'. In other
+    # cases, like paths (value = 'foo/bar' and not value = '"foo/bar"'),
+    # literal_eval will raise a SyntaxError.
+    except (ValueError, SyntaxError):
+        decoded = value
+    if len(_LITERAL_EVAL_CACHE) < _LITERAL_EVAL_CACHE_MAX_SIZE and _is_immutable_literal(
+        decoded
+    ):
+        _LITERAL_EVAL_CACHE[value] = decoded
+    return decoded
+
+
+# Leaf types that are immutable and therefore safe to share between configs
+_IMMUTABLE_LEAF_TYPES = {str, bytes, int, float, complex, bool, type(None)}
+
+
+def _is_immutable_literal(v):
+    """Test whether a decoded literal is safe to share between configs."""
+    if type(v) is tuple:
+        return all(_is_immutable_literal(x) for x in v)
+    return type(v) in _IMMUTABLE_LEAF_TYPES
+
+
+def _clone_cfg_value(v):
+    """Copy a config leaf value. Immutable scalars are shared; containers are
+    rebuilt recursively since lists may nest arbitrary valid values.
+    """
+    if type(v) is list:
+        return [_clone_cfg_value(x) for x in v]
+    if type(v) is tuple:
+        return tuple(_clone_cfg_value(x) for x in v)
+    if isinstance(v, CfgNode):
+        return v._fast_clone()
+    if np is not None and isinstance(v, np.ndarray):
+        return v.copy()
+    if isinstance(v, dict):
+        return {k: _clone_cfg_value(x) for k, x in v.items()}
+    return v
+
+
 def _valid_type(value, allow_cfg_node=False):
-    return (type(value) in _VALID_TYPES) or (
-        allow_cfg_node and isinstance(value, CfgNode)
+    return (
+        (type(value) in _VALID_TYPES)
+        or (allow_cfg_node and isinstance(value, CfgNode))
+        or (np is not None and isinstance(value, np.ndarray))
     )
 
 
-def _merge_a_into_b(a, b, root, key_list):
-    """Merge config dictionary a into config dictionary b, clobbering the
-    options in b whenever they are also specified in a.
+def _is_numeric_list(v):
+    """Test whether `v` is a non-empty list of plain numbers, i.e. a
+    candidate for typed ndarray storage.
     """
-    _assert_with_logging(
-        isinstance(a, CfgNode),
-        "`a` (cur type {}) must be an instance of {}".format(type(a), CfgNode),
-    )
-    _assert_with_logging(
-        isinstance(b, CfgNode),
-        "`b` (cur type {}) must be an instance of {}".format(type(b), CfgNode),
+    return (
+        type(v) is list
+        and len(v) > 0
+        and all(type(x) in (int, float) for x in v)
     )
 
-    for k, v_ in a.items():
-        full_key = ".".join(key_list + [k])
 
-        v = copy.deepcopy(v_)
-        v = b._decode_cfg_value(v)
+def _merge_a_into_b(a, b, root, key_list):
+    """Merge config dictionary a into config dictionary b, clobbering the
+    options in b whenever they are also specified in a.
 
-        if k in b:
-            v = _check_and_coerce_cfg_value_type(v, b[k], k, full_key)
-            # Recursively merge dicts
-            if isinstance(v, CfgNode):
-                try:
-                    _merge_a_into_b(v, b[k], root, key_list + [k])
-                except BaseException:
-                    raise
-            else:
-                b[k] = v
-        elif b.is_new_allowed():
-            b[k] = v
-        else:
-            if root.key_is_deprecated(full_key):
+    The merge is implemented with an explicit work stack instead of recursion
+    so that deeply nested configs do not pay for a Python frame (and a
+    `".".join` over the key path) per nested CfgNode.
+    """
+    # Validated once at the entry point only; the work loop below always
+    # pushes CfgNode pairs
+    if not isinstance(a, CfgNode):
+        raise AssertionError(
+            "`a` (cur type {}) must be an instance of {}".format(type(a), CfgNode)
+        )
+    if not isinstance(b, CfgNode):
+        raise AssertionError(
+            "`b` (cur type {}) must be an instance of {}".format(type(b), CfgNode)
+        )
+
+    # Each work item is (src node, dst node, pre-joined dotted key prefix)
+    work = [(a, b, ".".join(key_list))]
+    while work:
+        src, dst, prefix = work.pop()
+        # Merging a node into itself, or re-merging an unchanged subtree
+        # (e.g. harnesses that always merge their defaults back), is a no-op;
+        # the equality check is a C-level dict compare and the type walk only
+        # runs when it matches, so that True == 1 style coincidences cannot
+        # mask a type mismatch the merge would have surfaced
+        if src is dst:
+            continue
+        try:
+            if src == dst and _identical_types(src, dst):
                 continue
-            elif root.key_is_renamed(full_key):
-                root.raise_key_rename_error(full_key)
+        except ValueError:
+            # ndarray leaves compare elementwise and refuse bool conversion;
+            # such nodes are never no-op candidates, just merge them
+            pass
+        for k, v_ in src.items():
+            full_key = prefix + "." + k if prefix else k
+
+            if k in dst:
+                # Child CfgNodes are merged structurally; only leaves need to
+                # be copied, which the leaf branch below takes care of
+                if isinstance(v_, CfgNode) and isinstance(dst[k], CfgNode):
+                    work.append((v_, dst[k], full_key))
+                    continue
+                # The overwhelming majority of leaves are immutable scalars
+                # (or tuples of scalars) and can be shared outright; only
+                # mutable containers need an actual copy
+                if type(v_) in _IMMUTABLE_LEAF_TYPES or _is_immutable_literal(v_):
+                    v = v_
+                else:
+                    v = _clone_cfg_value(v_)
+                v = dst._decode_and_coerce_cfg_value(v, dst[k], k, full_key)
+                if isinstance(v, CfgNode):
+                    work.append((v, dst[k], full_key))
+                else:
+                    dst[k] = v
+            elif dst.is_new_allowed():
+                if type(v_) in _IMMUTABLE_LEAF_TYPES or _is_immutable_literal(v_):
+                    v = v_
+                else:
+                    v = _clone_cfg_value(v_)
+                dst[k] = dst._decode_cfg_value(v)
             else:
-                raise KeyError("Non-existent config key: {}".format(full_key))
+                status = root.__dict__.get(CfgNode.KEY_STATUS, _NO_KEY_STATUS).get(
+                    full_key
+                )
+                if status is None:
+                    raise KeyError("Non-existent config key: {}".format(full_key))
+                elif status[0] == _KEY_STATUS_RENAMED:
+                    root.raise_key_rename_error(full_key)
+                elif logger.isEnabledFor(logging.WARNING):
+                    logger.warning(
+                        "Deprecated config key (ignoring): {}".format(full_key)
+                    )
+
+
+def _identical_types(a, b):
+    """Given `a == b`, test whether the two values also agree on the exact
+    types of every nested value. Needed because Python equality conflates
+    e.g. bools with ints and ints with floats.
+    """
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return all(_identical_types(v, b[k]) for k, v in a.items())
+    if type(a) in (list, tuple):
+        return all(_identical_types(x, y) for x, y in zip(a, b))
+    return True
+
+
+# Casts allowed between mismatched leaf types, keyed by
+# (replacement type, original type)
+# list <-> tuple
+_COERCERS = {
+    (tuple, list): list,
+    (list, tuple): tuple,
+}
+# For py2: allow converting from str (bytes) to a unicode string
+try:
+    _COERCERS[(str, unicode)] = unicode  # noqa: F821
+except Exception:
+    pass
+# ndarray -> list/tuple when merging typed storage into plain containers;
+# the reverse direction needs the original's dtype and is handled inline in
+# _check_and_coerce_cfg_value_type
+if np is not None:
+    _COERCERS[(np.ndarray, list)] = lambda replacement: replacement.tolist()
+    _COERCERS[(np.ndarray, tuple)] = lambda replacement: tuple(replacement.tolist())
 
 
 def _check_and_coerce_cfg_value_type(replacement, original, key, full_key):
@@ -500,7 +1006,7 @@ def _check_and_coerce_cfg_value_type(replacement, original, key, full_key):
     replacement_type = type(replacement)
 
     # The types must match (with some exceptions)
-    if replacement_type == original_type:
+    if replacement_type is original_type:
         return replacement
 
     # If either of them is None, allow type conversion to one of the valid types
@@ -509,27 +1015,19 @@ def _check_and_coerce_cfg_value_type(replacement, original, key, full_key):
     ):
         return replacement
 
-    # Cast replacement from from_type to to_type if the replacement and original
-    # types match from_type and to_type
-    def conditional_cast(from_type, to_type):
-        if replacement_type == from_type and original_type == to_type:
-            return True, to_type(replacement)
-        else:
-            return False, None
-
-    # Conditionally casts
-    # list <-> tuple
-    casts = [(tuple, list), (list, tuple)]
-    # For py2: allow converting from str (bytes) to a unicode string
-    try:
-        casts.append((str, unicode))  # noqa: F821
-    except Exception:
-        pass
+    # Lists and tuples cast into typed array storage, preserving the dtype of
+    # the value they replace
+    if np is not None and original_type is np.ndarray and replacement_type in (
+        list,
+        tuple,
+    ):
+        return np.asarray(replacement, dtype=original.dtype)
 
-    for (from_type, to_type) in casts:
-        converted, converted_value = conditional_cast(from_type, to_type)
-        if converted:
-            return converted_value
+    # A single dict lookup on the exact (from, to) type pair replaces the
+    # chain of per-cast type comparisons
+    coercer = _COERCERS.get((replacement_type, original_type))
+    if coercer is not None:
+        return coercer(replacement)
 
     raise ValueError(
         "Type mismatch ({} vs. {}) with values ({} vs. {}) for config "
@@ -540,9 +1038,11 @@ def _check_and_coerce_cfg_value_type(replacement, original, key, full_key):
 
 
 def _assert_with_logging(cond, msg):
+    # Raised explicitly (rather than via the assert statement) so validation
+    # is not compiled away under `python -O`
     if not cond:
         logger.debug(msg)
-    assert cond, msg
+        raise AssertionError(msg)
 
 
 def _load_module_from_file(name, filename):
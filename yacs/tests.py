@@ -1,4 +1,5 @@
 import logging
+import os
 import tempfile
 import unittest
 
@@ -6,6 +7,11 @@ import yacs.config
 import yaml
 from yacs.config import CfgNode as CN
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 try:
     _ignore = unicode  # noqa: F821
     PY2 = True
@@ -150,6 +156,22 @@ class TestCfg(unittest.TestCase):
         with self.assertRaises(ValueError):
             cfg.merge_from_other_cfg(cfg2)
 
+    def test_merge_cfg_noop(self):
+        # Merging a clone (or a config into itself) leaves the tree unchanged
+        cfg = get_cfg()
+        cfg.merge_from_other_cfg(cfg.clone())
+        assert cfg == get_cfg()
+        cfg.merge_from_other_cfg(cfg)
+        assert cfg == get_cfg()
+        # The no-op skip compares types as well as values, so equal-by-==
+        # values of different types are still a type mismatch
+        a = CN()
+        a.FLAG = True
+        b = CN()
+        b.FLAG = 1
+        with self.assertRaises(ValueError):
+            b.merge_from_other_cfg(a)
+
     def test_merge_cfg_from_file(self):
         with tempfile.NamedTemporaryFile(mode="wt") as f:
             cfg = get_cfg()
@@ -175,6 +197,65 @@ class TestCfg(unittest.TestCase):
         assert cfg.MODEL.TYPE == "foobar"
         assert cfg.NUM_GPUS == 2
 
+    def test_merge_cfg_from_list_string_stays_string(self):
+        # Overrides for string destinations are taken verbatim; values that
+        # would literal_eval to another type stay strings instead of raising
+        # a type mismatch
+        cfg = get_cfg()
+        cfg.merge_from_list(["MODEL.TYPE", "True"])
+        assert cfg.MODEL.TYPE == "True"
+        cfg.merge_from_list(["MODEL.TYPE", "0.5"])
+        assert cfg.MODEL.TYPE == "0.5"
+        # "None" still decodes to None, the one non-string value a string
+        # key accepts
+        cfg.merge_from_list(["MODEL.TYPE", "None"])
+        assert cfg.MODEL.TYPE is None
+        cfg2 = get_cfg()
+        cfg2.merge_from_other_cfg(CN.load_cfg("MODEL:\n  TYPE: None"))
+        assert cfg2.MODEL.TYPE is None
+
+    def test_merge_cfg_from_list_frozen(self):
+        # Frozen configs resolve overrides through the precomputed key-path
+        # trie built by freeze()
+        cfg = get_cfg()
+        cfg.freeze()
+        cfg.merge_from_list(["TRAIN.SCALES", "(100,)", "MODEL.TYPE", "foobar"])
+        assert cfg.TRAIN.SCALES == (100,)
+        assert cfg.MODEL.TYPE == "foobar"
+        with self.assertRaises(AssertionError):
+            cfg.merge_from_list(["MODEL.DOES_NOT_EXIST", "IGNORE"])
+        with self.assertRaises(AssertionError):
+            cfg.merge_from_list(["MODEL.TYPE.NESTED", "IGNORE"])
+
+    def test_merge_cfg_from_list_last_override_wins(self):
+        # A subtree replacement clobbers an earlier write inside that
+        # subtree, and vice versa, exactly as the overrides are ordered
+        cfg = CN()
+        cfg.A = CN()
+        cfg.A.B = 1
+        cfg.merge_from_list(["A.B", "5", "A", {"B": 2}])
+        assert cfg.A.B == 2
+        cfg.merge_from_list(["A", {"B": 3}, "A.B", "7"])
+        assert cfg.A.B == 7
+
+    def test_merge_cfg_from_list_after_dict_mutators(self):
+        # Mutating the tree through inherited dict methods must invalidate
+        # cached path resolutions, or later overrides write into detached
+        # subtrees
+        cfg = CN()
+        cfg.A = CN()
+        cfg.A.B = 1
+        cfg.X = CN()
+        cfg.X.Y = 0
+        cfg.merge_from_list(["A.B", "2"])
+        cfg.update({"A": CN({"B": 100})})
+        cfg.merge_from_list(["A.B", "3"])
+        assert cfg.A.B == 3
+        cfg.merge_from_list(["X.Y", "5"])
+        del cfg["X"]
+        with self.assertRaises(AssertionError):
+            cfg.merge_from_list(["X.Y", "9"])
+
     def test_deprecated_key_from_list(self):
         # You should see logger messages like:
         #   "Deprecated config key (ignoring): MODEL.DILATION"
@@ -198,9 +279,9 @@ class TestCfg(unittest.TestCase):
 
     def test_load_cfg_invalid_type(self):
         class CustomClass(yaml.YAMLObject):
-            """A custom class that yaml.safe_load can load."""
+            """A custom class that the yacs yaml loader can load."""
 
-            yaml_loader = yaml.SafeLoader
+            yaml_loader = yacs.config._CfgNodeLoader
             yaml_tag = u"!CustomClass"
 
         # FOO.BAR.QUUX will have type CustomClass, which is not allowed
@@ -245,6 +326,17 @@ class TestCfg(unittest.TestCase):
             with self.assertRaises(KeyError):
                 cfg.merge_from_file(f.name)
 
+    def test_key_status_is_exclusive(self):
+        # A key holds a single status; re-registering reports the status the
+        # key already has
+        cfg = get_cfg()
+        with self.assertRaises(AssertionError) as ctx:
+            cfg.register_renamed_key("MODEL.DILATION", "MODEL.NEW_DILATION")
+        assert "already registered as a deprecated key" in str(ctx.exception)
+        with self.assertRaises(AssertionError) as ctx:
+            cfg.register_deprecated_key("EXAMPLE.OLD.KEY")
+        assert "already registered as a renamed key" in str(ctx.exception)
+
     def test_load_cfg_from_file(self):
         cfg = get_cfg()
         with tempfile.NamedTemporaryFile("wt") as f:
@@ -268,6 +360,15 @@ class TestCfg(unittest.TestCase):
         with self.assertRaises(AssertionError):
             cfg.INVALID_KEY_TYPE = object()
 
+    def test_reserved_state_keys(self):
+        # Internal state names are rejected even before the corresponding
+        # state has been materialized on the node
+        cfg = CN()
+        with self.assertRaises(AssertionError):
+            setattr(cfg, "__immutable__", True)
+        assert not cfg.is_frozen()
+        assert "__immutable__" not in cfg
+
     def test__str__(self):
         expected_str = """
 KWARGS:
@@ -310,6 +411,77 @@ TRAIN:
         assert cfg.KWARGS.Y.f == 4
 
 
+class TestMergeFromFileCache(unittest.TestCase):
+    def setUp(self):
+        yacs.config._FILE_CACHE.clear()
+
+    def test_repeated_merges_hit_the_cache(self):
+        with tempfile.NamedTemporaryFile(mode="wt", suffix=".yaml") as f:
+            cfg = get_cfg()
+            f.write(cfg.dump())
+            f.flush()
+            cfg.merge_from_file(f.name)
+            assert len(yacs.config._FILE_CACHE) == 1
+            cached = next(iter(yacs.config._FILE_CACHE.values()))
+            cfg.merge_from_file(f.name)
+            assert len(yacs.config._FILE_CACHE) == 1
+            assert next(iter(yacs.config._FILE_CACHE.values())) is cached
+
+    def test_cache_invalidated_on_rewrite(self):
+        with tempfile.NamedTemporaryFile(mode="wt", suffix=".yaml") as f:
+            cfg2 = get_cfg()
+            cfg2.MODEL.TYPE = "first"
+            f.write(cfg2.dump())
+            f.flush()
+            cfg = get_cfg()
+            cfg.merge_from_file(f.name)
+            assert cfg.MODEL.TYPE == "first"
+            # Rewrite with different-length contents so the size component of
+            # the cache key changes even if the mtime resolution is coarse
+            f.seek(0)
+            f.truncate()
+            cfg2.MODEL.TYPE = "second_longer"
+            f.write(cfg2.dump())
+            f.flush()
+            cfg.merge_from_file(f.name)
+            assert cfg.MODEL.TYPE == "second_longer"
+
+    def test_cached_cfg_isolated_from_mutation(self):
+        with tempfile.NamedTemporaryFile(mode="wt", suffix=".yaml") as f:
+            base = CN()
+            base.SIZES = [1, 2]
+            f.write(base.dump())
+            f.flush()
+            cfg = base.clone()
+            cfg.merge_from_file(f.name)
+            cfg.SIZES.append(3)
+            cfg_fresh = base.clone()
+            cfg_fresh.merge_from_file(f.name)
+            assert cfg_fresh.SIZES == [1, 2]
+
+    def test_py_source_reexecuted_on_every_merge(self):
+        with tempfile.NamedTemporaryFile(mode="wt", suffix=".py") as f:
+            f.write(
+                "import os\n"
+                "from yacs.config import CfgNode as CN\n"
+                "cfg = CN()\n"
+                "cfg.TRAIN = CN()\n"
+                "cfg.TRAIN.HYPERPARAMETER_1 = float(os.environ['YACS_TEST_HP'])\n"
+            )
+            f.flush()
+            cfg = get_cfg()
+            os.environ["YACS_TEST_HP"] = "0.5"
+            try:
+                cfg.merge_from_file(f.name)
+                assert cfg.TRAIN.HYPERPARAMETER_1 == 0.5
+                os.environ["YACS_TEST_HP"] = "0.25"
+                cfg.merge_from_file(f.name)
+                assert cfg.TRAIN.HYPERPARAMETER_1 == 0.25
+            finally:
+                del os.environ["YACS_TEST_HP"]
+            assert len(yacs.config._FILE_CACHE) == 0
+
+
 class TestCfgNodeSubclass(unittest.TestCase):
     def test_merge_cfg_from_file(self):
         with tempfile.NamedTemporaryFile(mode="wt") as f:
@@ -352,6 +524,95 @@ class TestCfgNodeSubclass(unittest.TestCase):
         assert cfg.MODEL.TYPE == s
 
 
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestNumericListsAsNdarray(unittest.TestCase):
+    def setUp(self):
+        CN.NUMERIC_LISTS_AS_NDARRAY = True
+
+    def tearDown(self):
+        CN.NUMERIC_LISTS_AS_NDARRAY = False
+
+    def test_storage_from_dict_and_yaml(self):
+        cfg = CN({"MODEL": {"PIXEL_MEAN": [0.1, 0.2, 0.3]}})
+        assert isinstance(cfg.MODEL.PIXEL_MEAN, np.ndarray)
+        cfg2 = CN.load_cfg("MODEL:\n  PIXEL_MEAN: [0.1, 0.2, 0.3]")
+        assert isinstance(cfg2.MODEL.PIXEL_MEAN, np.ndarray)
+        assert cfg2.MODEL.PIXEL_MEAN.tolist() == [0.1, 0.2, 0.3]
+
+    def test_coerce_list_into_ndarray(self):
+        cfg = CN({"MEAN": [0.1, 0.2]})
+        dtype = cfg.MEAN.dtype
+        cfg.merge_from_list(["MEAN", "[0.5, 0.6]"])
+        assert isinstance(cfg.MEAN, np.ndarray)
+        assert cfg.MEAN.dtype == dtype
+        assert cfg.MEAN.tolist() == [0.5, 0.6]
+
+    def test_coerce_ndarray_into_plain_containers(self):
+        CN.NUMERIC_LISTS_AS_NDARRAY = False
+        dst = CN()
+        dst.SIZES = [1.0, 2.0]
+        dst.SCALES = (1, 2)
+        src = CN()
+        src.SIZES = np.asarray([3.0, 4.0])
+        src.SCALES = np.asarray([3, 4])
+        dst.merge_from_other_cfg(src)
+        assert type(dst.SIZES) is list and dst.SIZES == [3.0, 4.0]
+        assert type(dst.SCALES) is tuple and dst.SCALES == (3, 4)
+
+    def test_clone_copies_arrays(self):
+        cfg = CN({"MEAN": [0.1, 0.2]})
+        cfg2 = cfg.clone()
+        cfg2.MEAN[0] = 9.0
+        assert cfg.MEAN[0] == 0.1
+
+    def test_file_cache_keyed_by_flag(self):
+        # The same file parsed with the flag off and on must not share a
+        # cache entry
+        CN.NUMERIC_LISTS_AS_NDARRAY = False
+        with tempfile.NamedTemporaryFile(mode="wt", suffix=".yaml") as f:
+            f.write("MEAN: [0.1, 0.2]\n")
+            f.flush()
+            cfg = CN()
+            cfg.MEAN = [0.0, 0.0]
+            cfg.merge_from_file(f.name)
+            assert type(cfg.MEAN) is list
+            CN.NUMERIC_LISTS_AS_NDARRAY = True
+            cfg2 = CN()
+            cfg2.MEAN = np.asarray([0.0, 0.0])
+            cfg2.merge_from_file(f.name)
+            assert isinstance(cfg2.MEAN, np.ndarray)
+
+    def test_dump_round_trip(self):
+        cfg = CN({"MEAN": [0.5, 1.5]})
+        dumped = cfg.dump()
+        CN.NUMERIC_LISTS_AS_NDARRAY = False
+        loaded = CN.load_cfg(dumped)
+        assert loaded.MEAN == [0.5, 1.5]
+
+    def test_safe_dump_unaffected(self):
+        # The ndarray representer is private to yacs; plain yaml.safe_dump
+        # must still reject arrays
+        with self.assertRaises(yaml.representer.RepresenterError):
+            yaml.safe_dump({"MEAN": np.asarray([1.0])})
+
+
+@unittest.skipIf(np is not None, "numpy is installed")
+class TestNumericListsRequireNumpy(unittest.TestCase):
+    def setUp(self):
+        CN.NUMERIC_LISTS_AS_NDARRAY = True
+
+    def tearDown(self):
+        CN.NUMERIC_LISTS_AS_NDARRAY = False
+
+    def test_dict_path_requires_numpy(self):
+        with self.assertRaises(AssertionError):
+            CN({"MEAN": [0.1, 0.2]})
+
+    def test_yaml_path_requires_numpy(self):
+        with self.assertRaises(AssertionError):
+            CN.load_cfg("MEAN: [0.1, 0.2]")
+
+
 if __name__ == "__main__":
     logging.basicConfig()
     yacs_logger = logging.getLogger("yacs.config")